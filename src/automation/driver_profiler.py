@@ -0,0 +1,147 @@
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+from src.structured_log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Modules whose functions count as "steps" when attributing a command to its caller
+STEP_MODULES = ("src.automation.", "src.utils")
+# Shared helpers that are never a step themselves; their commands go to whoever called them
+STEP_HELPERS = ("_wait_until", "_sleep")
+NO_GUIDE = "(setup)"
+
+_context = threading.local()
+
+
+@contextlib.contextmanager
+def profile_guide(guide):
+    """Attribute every WebDriver command issued by this thread inside the block to `guide`."""
+    previous = getattr(_context, "guide", None)
+    _context.guide = guide
+    try:
+        yield
+    finally:
+        _context.guide = previous
+
+
+def _calling_step():
+    # Walk out from the wrapper to the first named function of our own code.
+    # WebDriverWait conditions, WebElement methods, lambdas, comprehensions and
+    # STEP_HELPERS are skipped, so polling is charged to the step that started the wait.
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        name = frame.f_code.co_name
+        if (module.startswith(STEP_MODULES) and module != __name__
+                and not name.startswith("<") and name not in STEP_HELPERS):
+            return f"{module.rsplit('.', 1)[-1]}.{name}"
+        frame = frame.f_back
+    return "(unknown)"
+
+# ============================================================
+# 🧱 PROFILER
+# ============================================================
+class DriverProfiler:
+    """
+    Records every command the driver sends to chromedriver with its latency,
+    calling step and current guide. All WebDriver and WebElement calls go
+    through driver.execute, so wrapping that one method covers them all.
+    """
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def attach(self, driver):
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                elapsed = time.perf_counter() - start
+                record = (getattr(_context, "guide", None) or NO_GUIDE, _calling_step(), driver_command, elapsed)
+                with self.lock:
+                    self.records.append(record)
+
+        driver.execute = execute
+        driver.profiler = self
+        return driver
+
+    def report(self, top=10):
+        with self.lock:
+            records = list(self.records)
+
+        per_guide = {}
+        per_command = {}
+        per_step_command = {}
+        for guide, step, command, elapsed in records:
+            for table, key in ((per_guide, guide), (per_command, command), (per_step_command, (step, command))):
+                entry = table.setdefault(key, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+        def rows(table, key_names):
+            ordered = sorted(table.items(), key=lambda item: item[1][1], reverse=True)
+            result = []
+            for key, (count, seconds) in ordered:
+                key = key if isinstance(key, tuple) else (key,)
+                row = dict(zip(key_names, key))
+                row.update(round_trips=count, total_ms=round(seconds * 1000, 1),
+                           avg_ms=round(seconds * 1000 / count, 2))
+                result.append(row)
+            return result
+
+        guides = rows(per_guide, ["guide"])
+        return {
+            "total_round_trips": len(records),
+            "total_ms": round(sum(r[3] for r in records) * 1000, 1),
+            "guides": [row for row in guides if row["guide"] != NO_GUIDE],
+            "setup": next((row for row in guides if row["guide"] == NO_GUIDE), None),
+            "hottest_commands": rows(per_command, ["command"])[:top],
+            "hottest_steps": rows(per_step_command, ["step", "command"])[:top],
+        }
+
+    def log_report(self, top=10):
+        report = self.report(top)
+        guides = report["guides"]
+        logger.info("%d chromedriver round trips, %s ms total", report["total_round_trips"], report["total_ms"])
+        if guides:
+            avg_trips = sum(row["round_trips"] for row in guides) / len(guides)
+            logger.info("%d guides, %.1f round trips per guide on average", len(guides), avg_trips)
+            for row in guides:
+                logger.info("%d round trips", row["round_trips"], extra={"guide": row["guide"], "duration_ms": row["total_ms"]})
+        for row in report["hottest_steps"]:
+            logger.info("Hot command %s: %d calls, avg %s ms", row["command"], row["round_trips"], row["avg_ms"],
+                        extra={"step": row["step"], "duration_ms": row["total_ms"]})
+        return report
+
+    def save(self, reports_dir, top=10):
+        os.makedirs(reports_dir, exist_ok=True)
+        file_name = os.path.join(reports_dir, f"webdriver_profile_{datetime.datetime.now():%Y-%m-%d_%H%M%S}.json")
+        with open(file_name, "w", encoding="utf-8") as f:
+            json.dump(self.report(top), f, indent=2, ensure_ascii=False)
+        return file_name
+
+
+def get_profiler(driver):
+    return getattr(driver, "profiler", None)
+
+
+def finish_profiling(driver, reports_dir):
+    """Log and save the report if `driver` was profiled. Returns the report file or None."""
+    profiler = get_profiler(driver)
+    if profiler is None:
+        return None
+    profiler.log_report()
+    file_name = profiler.save(reports_dir)
+    logger.info("Profile report saved to %s", file_name)
+    return file_name
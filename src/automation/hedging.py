@@ -0,0 +1,223 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.automation.driver_profiler import DriverProfiler, profile_guide
+from src.automation.web_actions import setup_driver, login, open_shipment_explorer, lookup_shipment
+from src.structured_log import get_logger, log_context
+
+
+logger = get_logger(__name__)
+
+SPARE_POLL_INTERVAL = 0.25 # How often a straggling lookup re-checks whether it finished while waiting for a spare
+
+
+# ============================================================
+# 🧱 DRIVER POOL
+# ============================================================
+def start_pool_driver(username, password, show_browser=False, profiler=None):
+    """Start one logged-in driver with the Explorer open, attached to `profiler` if given."""
+    driver = setup_driver(show_browser=show_browser)
+    if profiler is not None: # Before login, so setup shows up in the report like the single-driver path
+        profiler.attach(driver)
+    try:
+        login(driver, username, password)
+        open_shipment_explorer(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+def start_driver_pool(size, username, password, show_browser=False, profile=False):
+    """
+    Start `size` logged-in drivers with the Explorer open, in parallel.
+    Each lookup needs its own WebDriver session: commands on tabs of one
+    driver are serialized by chromedriver, so they can't race each other.
+    """
+    # One profiler for the whole pool so the report covers every session
+    profiler = DriverProfiler() if profile else None
+    with ThreadPoolExecutor(max_workers=size) as executor:
+        futures = [executor.submit(start_pool_driver, username, password, show_browser, profiler) for _ in range(size)]
+        drivers, errors = [], []
+        for future in futures:
+            try:
+                drivers.append(future.result())
+            except Exception as e:
+                errors.append(e)
+
+    if errors:
+        for driver in drivers:
+            driver.quit()
+        raise errors[0]
+    return drivers
+
+# ============================================================
+# 🧱 HEDGED LOOKUP
+# ============================================================
+class HedgedLookup:
+    """
+    Looks up guides on a pool of drivers under a run deadline.
+
+    Each guide starts on an idle driver. If it is still running after the hedge
+    threshold, the same lookup is issued on another idle driver; the first valid
+    result wins and the other lookup is cancelled. The threshold is the
+    `percentile` of past lookup latencies, lowered to the per-guide time budget
+    left before the deadline when the run falls behind.
+
+    A driver goes back to the pool only with the Explorer open. One that can't
+    reopen it is quit and replaced through `start_driver`, or dropped from the
+    pool without it. `drivers` is kept up to date, so the caller quits the
+    right sessions after close().
+    """
+    def __init__(self, drivers, deadline_seconds, total_guides, percentile=90,
+                 min_samples=5, initial_threshold=10.0, start_driver=None):
+        self.drivers = drivers
+        self.drivers_lock = threading.Lock()
+        self.start_driver = start_driver
+        self.returning = []
+        self.idle_drivers = queue.Queue()
+        for driver in drivers:
+            self.idle_drivers.put(driver)
+        self.executor = ThreadPoolExecutor(max_workers=len(drivers))
+        self.deadline = time.monotonic() + deadline_seconds
+        self.remaining = total_guides
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_threshold = initial_threshold
+        self.latencies = []
+        self.hedged_count = 0
+        self.hedge_wins = 0
+
+    def hedge_threshold(self):
+        if len(self.latencies) >= self.min_samples:
+            ordered = sorted(self.latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            threshold = ordered[index]
+        else:
+            threshold = self.initial_threshold
+        budget = (self.deadline - time.monotonic()) / max(self.remaining, 1)
+        # Hedging sooner than the fastest lookup ever seen only duplicates lookups that were on time
+        floor = min(self.latencies) if self.latencies else 0.5
+        return max(floor, min(threshold, budget))
+
+    def _run(self, driver, guide, cancel_event):
+        needs_reopen = False
+        try:
+            with profile_guide(guide), log_context(guide=guide):
+                record, needs_reopen = lookup_shipment(driver, guide, cancel_event)
+                if needs_reopen and not cancel_event.is_set():
+                    open_shipment_explorer(driver)
+                    record, needs_reopen = lookup_shipment(driver, guide, cancel_event)
+            return record
+        except Exception:
+            logger.exception("Driver failed on %s", guide, extra={"outcome": "error"})
+            needs_reopen = True
+            return None
+        finally:
+            # Same pause between searches as the sequential path, before the driver is reused
+            returner = threading.Thread(target=self._return_driver, args=(driver, needs_reopen), daemon=True)
+            with self.drivers_lock:
+                self.returning = [thread for thread in self.returning if thread.is_alive()] + [returner]
+            returner.start()
+
+    def _return_driver(self, driver, needs_reopen):
+        time.sleep(random.uniform(1, 4))
+        if needs_reopen:
+            driver = self._recover_driver(driver)
+            if driver is None:
+                return
+        self.idle_drivers.put(driver)
+
+    def _recover_driver(self, driver):
+        """Reopen the Explorer on `driver`, or replace it. Returns the usable driver or None."""
+        try:
+            open_shipment_explorer(driver)
+            return driver
+        except Exception:
+            logger.warning("Driver could not reopen the Explorer, replacing it", extra={"outcome": "error"})
+        with self.drivers_lock:
+            self.drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+        replacement = None
+        if self.start_driver is not None:
+            try:
+                replacement = self.start_driver()
+            except Exception:
+                logger.exception("Could not start a replacement driver", extra={"outcome": "error"})
+        with self.drivers_lock:
+            if replacement is not None:
+                self.drivers.append(replacement)
+            elif not self.drivers:
+                self.idle_drivers.put(None) # Wake lookup() so it fails instead of waiting forever
+        return replacement
+
+    def _get_driver(self):
+        driver = self.idle_drivers.get()
+        if driver is None:
+            self.idle_drivers.put(None)
+            raise RuntimeError("No usable drivers left in the pool")
+        return driver
+
+    def _wait_for_spare(self, primary):
+        """
+        Once the primary lookup straggles, wait for an idle driver until the
+        primary finishes; drivers still pausing in _return_driver join late.
+        Returns the spare driver, or None if the primary finished first.
+        """
+        while not primary.done():
+            try:
+                spare = self.idle_drivers.get(timeout=SPARE_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if spare is None: # Keep the empty pool marker for the next lookup
+                self.idle_drivers.put(None)
+                return None
+            if primary.done():
+                self.idle_drivers.put(spare)
+                return None
+            return spare
+        return None
+
+    def lookup(self, guide):
+        """Look up one guide, hedging it if it straggles. Returns the record or None."""
+        started = time.monotonic()
+        cancel_event = threading.Event()
+        primary = self.executor.submit(self._run, self._get_driver(), guide, cancel_event)
+        pending = {primary}
+
+        wait(pending, timeout=self.hedge_threshold())
+        spare = self._wait_for_spare(primary)
+        if spare is not None:
+            self.hedged_count += 1
+            logger.info("Guide is straggling, reissuing on another driver", extra={
+                "guide": guide, "outcome": "hedged", "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            })
+            pending.add(self.executor.submit(self._run, spare, guide, cancel_event))
+
+        record = None
+        while pending and record is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result() is not None:
+                    record = future.result()
+                    if future is not primary:
+                        self.hedge_wins += 1
+                    break
+        cancel_event.set() # Stop the losing lookup, if any
+
+        self.latencies.append(time.monotonic() - started)
+        self.remaining -= 1
+        return record
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for returner in list(self.returning): # Let recoveries finish before the caller quits `drivers`
+            returner.join()
+        logger.info("%d guides hedged, %d won by the duplicate", self.hedged_count, self.hedge_wins)
@@ -0,0 +1,214 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import re
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import LOG_LEVEL, LOG_FORMAT, LOG_FILE
+from src.structured_log import configure_logging, get_logger
+
+
+logger = get_logger(__name__, __spec__)
+
+
+# Serializes a clone of the DOM so it can be replayed offline, leaving the live page untouched:
+# - input/textarea values typed by the portal's scripts are copied into the clone,
+# - password inputs are blanked so credentials never reach the snapshot,
+# - elements hidden by the portal's CSS get an inline `display: none`,
+# - scripts and external stylesheets are dropped so replay never touches the network.
+SNAPSHOT_SCRIPT = """
+const live = document.documentElement.querySelectorAll('*');
+const clone = document.documentElement.cloneNode(true);
+const copies = clone.querySelectorAll('*');
+for (let i = 0; i < live.length; i++) {
+    const el = live[i], copy = copies[i];
+    if (el.tagName === 'INPUT') {
+        if (el.type === 'password') {
+            copy.setAttribute('value', '');
+        } else if (el.type === 'checkbox' || el.type === 'radio') {
+            if (el.checked) { copy.setAttribute('checked', ''); } else { copy.removeAttribute('checked'); }
+        } else {
+            copy.setAttribute('value', el.value);
+        }
+    } else if (el.tagName === 'TEXTAREA') {
+        copy.textContent = el.value;
+    }
+    if (el.id) {
+        const style = window.getComputedStyle(el);
+        if (style.display === 'none' || style.visibility === 'hidden') {
+            copy.setAttribute('style', (copy.getAttribute('style') || '') + ';display:none !important');
+        }
+    }
+}
+clone.querySelectorAll('script, link[rel="stylesheet"], iframe').forEach(function (el) { el.remove(); });
+return '<!DOCTYPE html>\\n' + clone.outerHTML;
+"""
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# ============================================================
+# 🧱 RECORDER
+# ============================================================
+class PageRecorder:
+    """Saves DOM snapshots of portal pages plus a manifest with what the live run extracted."""
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+        self.counter = 0
+        self.lock = threading.Lock()
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def capture(self, driver, page, guide=None, expected=None):
+        with self.lock:
+            self.counter += 1
+            counter = self.counter
+        label = re.sub(r"[^A-Za-z0-9_-]", "", f"{page}_{guide}" if guide else page)
+        file_name = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{counter:05d}-{label}.html"
+        try:
+            html = driver.execute_script(SNAPSHOT_SCRIPT)
+        except Exception as e:
+            logger.warning("Could not snapshot '%s': %s", page, e)
+            return None
+
+        with open(os.path.join(self.snapshot_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(html)
+        entry = {
+            "file": file_name,
+            "page": page,
+            "guide": guide,
+            "url": driver.current_url,
+            "expected": expected,
+        }
+        with self.lock, open(os.path.join(self.snapshot_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return file_name
+
+
+_active_recorder = None
+
+
+def start_recording(snapshot_dir):
+    global _active_recorder
+    _active_recorder = PageRecorder(snapshot_dir)
+    logger.info("Recording pages to %s", snapshot_dir)
+    return _active_recorder
+
+
+def stop_recording():
+    global _active_recorder
+    _active_recorder = None
+
+
+def record_page(driver, page, guide=None, expected=None):
+    """Snapshot the current page if recording is active; a no-op otherwise."""
+    if _active_recorder is not None:
+        _active_recorder.capture(driver, page, guide=guide, expected=expected)
+
+# ============================================================
+# 🧱 REPLAY
+# ============================================================
+def load_manifest(snapshot_dir):
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def serve_snapshots(snapshot_dir):
+    """Serve the snapshot directory on a local port. Returns (server, base_url)."""
+    handler = functools.partial(_QuietHandler, directory=snapshot_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def check_snapshot(driver, entry):
+    """Run the production check for the snapshot's page type. Returns the observed value."""
+    # Imported here because web_actions imports this module for record_page
+    from selenium.webdriver.common.by import By
+    from src.automation.web_actions import check_login_status, extract_shipment_fields, EXPLORER_CARD_XPATH
+
+    page = entry["page"]
+    if page.startswith("login"):
+        return check_login_status(driver)
+    if page == "home":
+        return len(driver.find_elements(By.XPATH, EXPLORER_CARD_XPATH)) > 0
+    if page == "result":
+        return extract_shipment_fields(driver)
+    return None
+
+
+def expected_value(entry):
+    if entry["page"] == "home":
+        return True
+    return entry["expected"]
+
+
+def replay_snapshots(snapshot_dir, driver=None, repeat=1, show_browser=False):
+    """
+    Replay every recorded snapshot through the production login check and
+    extraction code, offline, and compare with what the live run saw.
+    Returns a summary dict with pass/fail counts and timings.
+    """
+    from src.automation.web_actions import setup_driver
+
+    entries = load_manifest(snapshot_dir)
+    server, base_url = serve_snapshots(snapshot_dir)
+    own_driver = driver is None
+    if own_driver:
+        driver = setup_driver(show_browser=show_browser)
+
+    passed, mismatches, durations = 0, [], []
+    started = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for entry in entries:
+                driver.get(f"{base_url}/{entry['file']}")
+                check_start = time.perf_counter()
+                observed = check_snapshot(driver, entry)
+                durations.append(time.perf_counter() - check_start)
+                if observed == expected_value(entry):
+                    passed += 1
+                else:
+                    mismatches.append({"file": entry["file"], "expected": expected_value(entry), "observed": observed})
+    finally:
+        server.shutdown()
+        if own_driver:
+            driver.quit()
+
+    total_time = time.perf_counter() - started
+    summary = {
+        "snapshots": len(entries),
+        "checks": passed + len(mismatches),
+        "passed": passed,
+        "mismatches": mismatches,
+        "total_seconds": round(total_time, 3),
+        "avg_check_ms": round(1000 * sum(durations) / len(durations), 2) if durations else 0,
+    }
+    logger.info("%d/%d checks passed in %ss (avg %s ms per check)",
+                summary["passed"], summary["checks"], summary["total_seconds"], summary["avg_check_ms"])
+    for mismatch in mismatches:
+        logger.error("%s: expected %r, got %r", mismatch["file"], mismatch["expected"], mismatch["observed"],
+                     extra={"outcome": "mismatch"})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded portal pages through the extraction code.")
+    parser.add_argument("snapshot_dir", help="Directory written by a recording run.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the whole set this many times.")
+    parser.add_argument("--show-browser", action="store_true")
+    args = parser.parse_args(argv)
+    configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
+    summary = replay_snapshots(args.snapshot_dir, repeat=args.repeat, show_browser=args.show_browser)
+    raise SystemExit(0 if not summary["mismatches"] else 1)
+
+
+if __name__ == "__main__":
+    main()
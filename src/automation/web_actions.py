@@ -7,8 +7,18 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium import webdriver
 from selenium.common.exceptions import UnexpectedAlertPresentException, TimeoutException
-from src.utils import create_or_load_excel, handle_alert_and_reopen
+from src.utils import handle_alert_and_reopen
+from src.automation.driver_profiler import DriverProfiler
+from src.automation.page_recorder import record_page
 from src.config import LOGIN_URL
+from src.structured_log import get_logger
+
+
+logger = get_logger(__name__)
+
+EXPLORER_CARD_XPATH = "//p[contains(.,'Explorador Envios')]"
+# Result inputs in the Shipment Explorer, in report column order
+SHIPMENT_FIELD_IDS = ("tbxNumeroGuia1", "tbxNombreDes", "tbxTelefonoDes", "tbxValorComercial")
 
 
 class AuthenticationError(Exception):
@@ -18,7 +28,7 @@ class AuthenticationError(Exception):
 # ============================================================
 # 🧱 SETUP SELENIUM DRIVER
 # ============================================================
-def setup_driver(show_browser=True): # Add show_browser parameter
+def setup_driver(show_browser=True, profile=False): # Add show_browser parameter
     chrome_options = Options()
     chrome_options.add_argument("--start-maximized")
     chrome_options.add_argument("--disable-notifications")
@@ -27,14 +37,44 @@ def setup_driver(show_browser=True): # Add show_browser parameter
         chrome_options.add_argument("--disable-gpu") # Recommended for headless
         chrome_options.add_argument("--no-sandbox") # Recommended for headless
     driver = webdriver.Chrome(service=Service(), options=chrome_options)
-    print("✅ [setup_driver] Driver started successfully.")
+    if profile: # Opt-in: record every chromedriver round trip
+        DriverProfiler().attach(driver)
+    logger.info("Driver started", extra={"outcome": "success"})
     return driver
 
+# ============================================================
+# 🧱 LOGIN STATUS CHECK
+# ============================================================
+# Custom wait condition for the login alert.
+# It returns a truthy value ("success" or "error") when the condition is met,
+# and False otherwise, telling the wait to continue.
+def check_login_status(d):
+    try:
+        # Find the alert element
+        alert_element = d.find_element(By.ID, "swal2-title")
+        
+        # If the alert is not visible, login is successful.
+        if not alert_element.is_displayed():
+            return "success"
+        
+        # If the alert shows the error text, it's a failure.
+        if "Error de autenticación" in alert_element.text:
+            return "error"
+        
+        # If none of the above, the "Validando..." message is still up.
+        # Return False to keep waiting.
+        return False
+
+    except:
+        # If the element can't be found in the DOM, it means the alert is gone.
+        # This is a successful login.
+        return "success"
+
 # ============================================================
 # 🧱 LOGIN
 # ============================================================
 def login(driver, username, password):
-    print("🌐 [STEP 1] Logging in...")
+    logger.info("Logging in")
     driver.get(LOGIN_URL)
     wait = WebDriverWait(driver, 25) # A single wait object with a 25s timeout
 
@@ -44,53 +84,29 @@ def login(driver, username, password):
     pass_input.send_keys(password)
 
     driver.find_element(By.ID, "botonLogin").click()
-    print("🔐 [login] Waiting for validation result...")
+    logger.debug("Waiting for validation result")
 
     try:
-        # This inner function will be our custom wait condition.
-        # It returns a truthy value ("success" or "error") when the condition is met,
-        # and False otherwise, telling the wait to continue.
-        def check_login_status(d):
-            try:
-                # Find the alert element
-                alert_element = d.find_element(By.ID, "swal2-title")
-                
-                # If the alert is not visible, login is successful.
-                if not alert_element.is_displayed():
-                    return "success"
-                
-                # If the alert shows the error text, it's a failure.
-                if "Error de autenticación" in alert_element.text:
-                    return "error"
-                
-                # If none of the above, the "Validando..." message is still up.
-                # Return False to keep waiting.
-                return False
-
-            except:
-                # If the element can't be found in the DOM, it means the alert is gone.
-                # This is a successful login.
-                return "success"
-
         # We wait until our custom check_login_status function returns something other than False.
         final_status = wait.until(check_login_status)
+        record_page(driver, f"login_{final_status}", expected=final_status)
         
-        print(f"  [login] Wait finished with status: {final_status}")
+        logger.debug("Login validation finished", extra={"outcome": final_status})
 
         if final_status == "error":
             raise AuthenticationError("Credenciales incorrectas. Por favor, verifique su usuario y contraseña.")
 
     except TimeoutException:
         # This will be raised by wait.until() if check_login_status always returns False for 25 seconds.
-        print("  [login] Timeout: 'Validando...' message was stuck on screen.")
+        logger.error("Login validation timed out: 'Validando...' message was stuck on screen", extra={"outcome": "timeout"})
         raise Exception("Login failed: validation timed out.")
     except AuthenticationError:
         raise # Re-raise for the UI to catch
-    except Exception as e:
-        print(f"❌ [login] An unexpected error occurred during validation: {e}")
+    except Exception:
+        logger.exception("Unexpected error during login validation", extra={"outcome": "error"})
         raise
 
-    print("✅ [login] Logged in successfully.")
+    logger.info("Logged in", extra={"outcome": "success"})
     return wait
 
 # ============================================================
@@ -98,13 +114,14 @@ def login(driver, username, password):
 # ============================================================
 def open_shipment_explorer(driver, timeout=40):
     wait = WebDriverWait(driver, timeout)
-    print("📦 [STEP 2] Opening 'Shipment Explorer' module...")
+    logger.info("Opening Shipment Explorer")
 
     try:
         initial_tabs = driver.window_handles
-        card = wait.until(EC.element_to_be_clickable((By.XPATH, "//p[contains(.,'Explorador Envios')]")))
+        card = wait.until(EC.element_to_be_clickable((By.XPATH, EXPLORER_CARD_XPATH)))
+        record_page(driver, "home")
         card.click()
-        print("🖱️ [STEP 2] Click performed, waiting for load...")
+        logger.debug("Explorer card clicked, waiting for load")
 
         start_time = time.time()
         while time.time() - start_time < timeout:
@@ -112,71 +129,117 @@ def open_shipment_explorer(driver, timeout=40):
             if len(current_tabs) > len(initial_tabs):
                 new_tab = list(set(current_tabs) - set(initial_tabs))[0]
                 driver.switch_to.window(new_tab)
-                print("🆕 [STEP 2] New tab activated.")
+                logger.debug("Explorer opened in a new tab")
                 break
             if "ExploradorEnvios.aspx" in driver.current_url:
-                print("🌐 [STEP 2] Page loading in the same tab.")
+                logger.debug("Explorer loading in the same tab")
                 break
             time.sleep(1)
 
         wait.until(EC.presence_of_element_located((By.ID, "tbxNumeroGuia")))
-        print("✅ [STEP 2] Shipment Explorer loaded successfully.")
+        logger.info("Shipment Explorer loaded", extra={"outcome": "success"})
         return wait
 
-    except Exception as e:
-        print(f"❌ [STEP 2] Error opening Shipment Explorer: {e}")
+    except Exception:
+        logger.exception("Error opening Shipment Explorer", extra={"outcome": "error"})
         raise
 
 # ============================================================
-# 🧱 PROCESS SINGLE SHIPMENT
+# 🧱 EXTRACT SHIPMENT FIELDS
+# ============================================================
+def extract_shipment_fields(driver):
+    """Read the result fields of the Shipment Explorer page, in report column order."""
+    return [
+        driver.find_element(By.ID, field_id).get_attribute("value").strip()
+        for field_id in SHIPMENT_FIELD_IDS
+    ]
+
 # ============================================================
-def process_single_shipment(driver, shipment, progress_callback_for_one_item, wb, ws, file_name):
+# 🧱 LOOK UP SHIPMENT
+# ============================================================
+class LookupCancelled(Exception):
+    """Raised inside lookup_shipment when another driver already won a hedged lookup."""
+    pass
+
+
+def _wait_until(wait, condition, cancel_event):
+    # Poll the condition, but give up early if the lookup was cancelled
+    if cancel_event is None:
+        return wait.until(condition)
+    result = wait.until(lambda d: cancel_event.is_set() or condition(d))
+    if cancel_event.is_set():
+        raise LookupCancelled()
+    return result
+
+
+def _sleep(seconds, cancel_event):
+    if cancel_event is None:
+        time.sleep(seconds)
+    elif cancel_event.wait(seconds):
+        raise LookupCancelled()
+
+
+def lookup_shipment(driver, shipment, cancel_event=None):
+    """
+    Search one shipment in the Explorer and return (record, needs_reopen).
+    record is None when nothing valid was found, the lookup failed or it was cancelled.
+    """
     wait = WebDriverWait(driver, 30)
 
     # Check for alerts and handle redirection
     if handle_alert_and_reopen(driver):
-        print("⚠️ [process_single_shipment] Alert handled, redirection occurred. Explorer needs re-opening.")
-        return False, True # False for success, True for needs_reopen
+        logger.warning("Alert handled, redirection occurred; Explorer needs re-opening", extra={"outcome": "needs_reopen"})
+        return None, True
 
-    print(f"\n🔎 [process_single_shipment] Processing shipment {shipment}...")
+    logger.debug("Looking up shipment %s", shipment)
     try:
-        input_field = wait.until(EC.visibility_of_element_located((By.ID, "tbxNumeroGuia")))
+        input_field = _wait_until(wait, EC.visibility_of_element_located((By.ID, "tbxNumeroGuia")), cancel_event)
         input_field.clear()
-        time.sleep(0.8)
+        _sleep(0.8, cancel_event)
         sanitized_shipment = shipment.encode('ascii', 'ignore').decode('ascii') # Sanitize input
         input_field.send_keys(sanitized_shipment)
 
-        search_button = wait.until(EC.element_to_be_clickable((By.ID, "btnShow")))
+        search_button = _wait_until(wait, EC.element_to_be_clickable((By.ID, "btnShow")), cancel_event)
         driver.execute_script("arguments[0].scrollIntoView(true);", search_button)
-        time.sleep(0.5)
+        _sleep(0.5, cancel_event)
         search_button.click()
-        time.sleep(1.2)
+        _sleep(1.2, cancel_event)
 
         # Extract data
-        tracking_number = driver.find_element(By.ID, "tbxNumeroGuia1").get_attribute("value").strip()
-        name = driver.find_element(By.ID, "tbxNombreDes").get_attribute("value").strip()
-        phone = driver.find_element(By.ID, "tbxTelefonoDes").get_attribute("value").strip()
-        value = driver.find_element(By.ID, "tbxValorComercial").get_attribute("value").strip()
+        tracking_number, name, phone, value = extract_shipment_fields(driver)
+        record_page(driver, "result", guide=shipment, expected=[tracking_number, name, phone, value])
 
         if not tracking_number:
-            print("⚠️ [process_single_shipment] No valid data found for this shipment.")
-            return False, False # Failed for this shipment, no re-open needed
+            logger.warning("No valid data found for shipment %s", shipment, extra={"outcome": "not_found"})
+            return None, False # Failed for this shipment, no re-open needed
 
-        ws.append([tracking_number, name, phone, value])
-        wb.save(file_name)
-        print(f"✅ [process_single_shipment] Shipment {shipment} saved ({name} | {phone} | {value})")
+        return [tracking_number, name, phone, value], False
 
-        time.sleep(random.uniform(1, 4))
-        
-        if progress_callback_for_one_item:
-            progress_callback_for_one_item() # Just signal that one item is done
-
-        return True, False # Success for this shipment, no re-open needed
+    except LookupCancelled:
+        logger.debug("Lookup of %s cancelled, another driver answered first", shipment, extra={"outcome": "cancelled"})
+        return None, False
 
     except UnexpectedAlertPresentException as e:
-        print(f"❌ [process_single_shipment] Unexpected alert during processing of {shipment}: {e}")
-        return False, True # False for success, True for needs_reopen
+        logger.warning("Unexpected alert while looking up %s: %s", shipment, e, extra={"outcome": "needs_reopen"})
+        return None, True
 
     except Exception as e:
-        print(f"❌ [process_single_shipment] Error processing shipment {shipment}: {e}")
-        return False, False
+        logger.error("Error looking up shipment %s: %s", shipment, e, extra={"outcome": "error"})
+        return None, False
+
+# ============================================================
+# 🧱 PROCESS SINGLE SHIPMENT
+# ============================================================
+def process_single_shipment(driver, shipment, record_callback=None):
+    record, needs_reopen = lookup_shipment(driver, shipment)
+    if record is None:
+        return False, needs_reopen # False for success
+
+    if record_callback: # The caller decides where the record goes once the queue accepts it
+        record_callback(record)
+    tracking_number, name, phone, value = record
+    logger.debug("Shipment %s extracted (%s | %s | %s)", shipment, name, phone, value)
+
+    time.sleep(random.uniform(1, 4))
+
+    return True, False # Success for this shipment, no re-open needed
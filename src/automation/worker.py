@@ -0,0 +1,196 @@
+import argparse
+import functools
+import getpass
+import os
+import time
+
+from src.automation.web_actions import setup_driver, login, open_shipment_explorer, process_single_shipment
+from src.automation.driver_profiler import finish_profiling, get_profiler, profile_guide
+from src.automation.hedging import HedgedLookup, start_driver_pool, start_pool_driver
+from src.automation.page_recorder import start_recording
+from src.config import (
+    WORK_QUEUE_PATH, WORK_QUEUE_VISIBILITY_TIMEOUT, WORK_QUEUE_MAX_ATTEMPTS, WORK_QUEUE_POLL_INTERVAL,
+    RECORD_PAGES_DIR, OUTPUT_FORMATS, OUTPUT_BUFFER_SIZE, PROFILE_WEBDRIVER, PROFILE_REPORTS_DIR,
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, REPORT_MODE, RUN_DEADLINE_SECONDS, HEDGE_POOL_SIZE, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_INITIAL_THRESHOLD,
+)
+from src.sinks import create_sinks
+from src.utils import get_project_path
+from src.structured_log import configure_logging, get_logger, log_context
+from src.work_queue import SQLiteWorkQueue, default_worker_id
+
+
+logger = get_logger(__name__, __spec__)
+
+
+# ============================================================
+# 🧱 PROCESS LEASED GUIDES
+# ============================================================
+def process_queue(driver, queue, worker_id, sink=None,
+                  stop_event=None, on_guide_start=None, on_guide_done=None, on_reopen=None,
+                  hedged_lookup=None, batch=None):
+    """
+    Lease guides from `queue` until it is drained, processing each one with `driver`,
+    or with the driver pool of `hedged_lookup` when a run deadline is set.
+    Records go to `sink` only once the queue accepted them, so a worker whose
+    lease expired never writes a row the new lease holder will write too.
+    Returns the number of guides processed successfully by this worker.
+    """
+    processed_count = 0
+    while not (stop_event and stop_event.is_set()):
+        lease = queue.lease(worker_id, batch=batch)
+        if lease is None:
+            if queue.has_outstanding(batch):
+                # Other workers hold leases that may still expire and come back
+                time.sleep(WORK_QUEUE_POLL_INTERVAL)
+                continue
+            break
+
+        if on_guide_start:
+            on_guide_start(lease.guide)
+
+        records = []
+        started = time.perf_counter()
+        with queue.keep_alive(lease):
+            if hedged_lookup is not None:
+                record = hedged_lookup.lookup(lease.guide)
+                if record is not None:
+                    records.append(record)
+                success_one, needs_reopen = record is not None, False
+            else:
+                with profile_guide(lease.guide), log_context(guide=lease.guide):
+                    success_one, needs_reopen = process_single_shipment(
+                        driver, lease.guide, record_callback=records.append
+                    )
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        outcome = "needs_reopen" if needs_reopen else "success" if success_one else "failed"
+        logger.info("Guide processed", extra={"guide": lease.guide, "outcome": outcome, "duration_ms": duration_ms})
+
+        if needs_reopen:
+            queue.release(lease)
+            if on_reopen:
+                on_reopen()
+            # Charged to the guide that needed it, like the hedged path does
+            with profile_guide(lease.guide), log_context(guide=lease.guide):
+                open_shipment_explorer(driver)
+            continue
+
+        if success_one:
+            if not queue.complete(lease, records[0]):
+                # The lease expired and the guide was handed to another worker, which owns the result now
+                logger.warning("Lease lost before completion, result discarded",
+                               extra={"guide": lease.guide, "outcome": "lease_lost"})
+                continue
+            if sink is not None:
+                sink.write(records[0])
+            processed_count += 1
+        else:
+            queue.fail(lease, "no valid data found or lookup error")
+
+        if on_guide_done:
+            on_guide_done(lease.guide, success_one)
+
+    return processed_count
+
+# ============================================================
+# 🧱 HEADLESS WORKER
+# ============================================================
+def run_worker(queue, username, password, show_browser=False, worker_id=None, profile=False,
+               deadline_seconds=None):
+    worker_id = worker_id or default_worker_id()
+    logger.info("Worker %s starting", worker_id)
+    hedged_lookup = None
+    if deadline_seconds:
+        drivers = start_driver_pool(HEDGE_POOL_SIZE, username, password, show_browser=show_browser, profile=profile)
+        hedged_lookup = HedgedLookup(
+            drivers, deadline_seconds, queue.pending(), HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_INITIAL_THRESHOLD,
+            start_driver=functools.partial(start_pool_driver, username, password, show_browser, get_profiler(drivers[0])),
+        )
+    else:
+        drivers = [setup_driver(show_browser=show_browser, profile=profile)]
+    first_driver = drivers[0] # HedgedLookup may drop it from `drivers`, but it still holds the profiler
+    try:
+        if hedged_lookup is None:
+            login(first_driver, username, password)
+            open_shipment_explorer(first_driver)
+        processed_count = process_queue(first_driver, queue, worker_id, hedged_lookup=hedged_lookup)
+    finally:
+        if hedged_lookup:
+            hedged_lookup.close()
+        finish_profiling(first_driver, get_project_path(PROFILE_REPORTS_DIR))
+        for driver in drivers:
+            driver.quit()
+    logger.info("Worker %s finished, %d guides processed", worker_id, processed_count)
+    return processed_count
+
+# ============================================================
+# 🧱 CENTRAL REPORT ASSEMBLY
+# ============================================================
+def assemble_report(queue, output_formats=OUTPUT_FORMATS, changes_only=REPORT_MODE == "changes", batch=None):
+    """Write results not reported yet (optionally of one batch) and mark them reported."""
+    job_ids, records = queue.unreported_results(batch)
+    sink = create_sinks(output_formats, buffer_size=OUTPUT_BUFFER_SIZE, changes_only=changes_only)
+    try:
+        sink.write_many(records)
+    finally:
+        sink.close()
+    queue.mark_reported(job_ids)
+    failures = queue.failures(batch)
+    logger.info("%d shipments written to %s, %d failed", len(records), ", ".join(sink.file_names), len(failures))
+    for guide, error in failures:
+        logger.warning("Guide failed: %s", error, extra={"guide": guide, "outcome": "failed"})
+    return sink.file_names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared work queue for Interrapidisimo automation workers.")
+    parser.add_argument("--queue", default=WORK_QUEUE_PATH, required=WORK_QUEUE_PATH is None,
+                        help="Path to the SQLite work queue file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add guides to the queue.")
+    enqueue_parser.add_argument("guides", nargs="*", help="Guide numbers to add.")
+    enqueue_parser.add_argument("--file", help="Text file with one guide per line.")
+
+    work_parser = subparsers.add_parser("work", help="Lease and process guides until the queue is drained.")
+    work_parser.add_argument("--username", required=True)
+    work_parser.add_argument("--show-browser", action="store_true")
+    work_parser.add_argument("--profile", action="store_true", default=PROFILE_WEBDRIVER,
+                             help="Count chromedriver round trips per guide and report the hottest commands.")
+    work_parser.add_argument("--deadline", type=float, default=RUN_DEADLINE_SECONDS,
+                             help="Target run time in seconds; enables hedged lookups on a driver pool.")
+    work_parser.add_argument("--record-pages", default=RECORD_PAGES_DIR,
+                             help="Directory to save page snapshots for offline replay.")
+
+    subparsers.add_parser("status", help="Show job counts by status.")
+    report_parser = subparsers.add_parser("report", help="Write results not reported yet to today's reports.")
+    report_parser.add_argument("--output", default=",".join(OUTPUT_FORMATS),
+                               help="Comma-separated output formats: xlsx, csv, jsonl, parquet.")
+    report_parser.add_argument("--changes-only", action="store_true", default=REPORT_MODE == "changes",
+                               help="Write only shipments that are new or changed since they were last written.")
+
+    args = parser.parse_args(argv)
+    configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
+    queue = SQLiteWorkQueue(get_project_path(args.queue), WORK_QUEUE_VISIBILITY_TIMEOUT, WORK_QUEUE_MAX_ATTEMPTS)
+
+    if args.command == "enqueue":
+        guides = list(args.guides)
+        if args.file:
+            with open(args.file, encoding="utf-8") as f:
+                guides.extend(line.strip() for line in f if line.strip())
+        queue.enqueue(guides)
+        logger.info("%d guides added", len(guides))
+    elif args.command == "work":
+        password = getpass.getpass("Password: ")
+        if args.record_pages:
+            start_recording(os.path.join(get_project_path(args.record_pages), default_worker_id().replace(":", "-")))
+        run_worker(queue, args.username, password, show_browser=args.show_browser, profile=args.profile,
+                   deadline_seconds=args.deadline)
+    elif args.command == "status":
+        print(queue.counts())
+    elif args.command == "report":
+        assemble_report(queue, [fmt.strip() for fmt in args.output.split(",") if fmt.strip()], args.changes_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,49 @@
-LOGIN_URL = "https://www3.interrapidisimo.com/SitioLogin/auth/login"
\ No newline at end of file
+LOGIN_URL = "https://www3.interrapidisimo.com/SitioLogin/auth/login"
+
+# Relative paths below are resolved against the project root.
+
+# Shared work queue. Leave as None to process only the guides typed in the UI.
+# Point it to a SQLite file (e.g. "data/work_queue.sqlite3") to share guides between workers.
+WORK_QUEUE_PATH = None
+WORK_QUEUE_VISIBILITY_TIMEOUT = 120 # Seconds a worker holds a guide before it can be reclaimed
+WORK_QUEUE_MAX_ATTEMPTS = 3
+WORK_QUEUE_POLL_INTERVAL = 5 # Seconds to wait while other workers still hold leases
+
+# Page recording. Set to a directory (e.g. "data/page_snapshots") to save the login, home and
+# Explorer result pages of each run for offline replay with `python -m src.automation.page_recorder`.
+RECORD_PAGES_DIR = None
+
+# Report outputs written by each run: any of "xlsx", "csv", "jsonl", "parquet" (parquet needs pyarrow).
+OUTPUT_FORMATS = ["xlsx"]
+OUTPUT_BUFFER_SIZE = 1 # Records held before writing to the sinks; raise it to batch the slow XLSX saves
+# Parquet keeps rows in memory until it has a full row group (or is closed); small groups make slow files.
+# A parquet file is only readable once closed, so a crash loses the run's file whatever this is.
+PARQUET_ROW_GROUP_SIZE = 1000
+
+# WebDriver profiling. When enabled, every chromedriver command is timed and attributed to its
+# guide and calling step; a round-trip report is printed and saved at the end of the run.
+PROFILE_WEBDRIVER = False
+PROFILE_REPORTS_DIR = "data/profiles"
+
+# Hedged lookups. Set a run deadline (seconds) to look guides up on a pool of drivers: a guide
+# that runs longer than the HEDGE_PERCENTILE of past lookups (or its share of the time left
+# before the deadline) is reissued on an idle driver and the first result wins.
+RUN_DEADLINE_SECONDS = None
+HEDGE_POOL_SIZE = 2 # Browser sessions, each logged in separately
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 5 # Lookups needed before the percentile is trusted
+HEDGE_INITIAL_THRESHOLD = 10 # Seconds, used until then
+
+# Logging. Records are handed to a background thread, so workers never block on console I/O.
+# LOG_FORMAT "json" writes one machine-readable record per line (run_id, guide, step, outcome,
+# duration_ms); "text" is easier to read. Use "DEBUG" for per-step detail, "WARNING" to keep
+# only problems.
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "json"
+LOG_FILE = None # None logs to stderr
+
+# Report mode. "all" writes every looked-up shipment; "changes" writes only shipments that are
+# new or whose data changed since they were last written to that format. Both modes record what
+# was written in FINGERPRINTS_PATH.
+REPORT_MODE = "all"
+FINGERPRINTS_PATH = "data/fingerprints.sqlite3"
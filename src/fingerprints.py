@@ -0,0 +1,78 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+def fingerprint(record):
+    """Compact 64-bit digest of an extracted record, in REPORT_COLUMNS order."""
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+# ============================================================
+# 🧱 FINGERPRINT STORE
+# ============================================================
+class FingerprintStore:
+    """
+    Last written fingerprint per output and tracking number, kept in a SQLite
+    file so it survives between runs. Each output (report format) is tracked on
+    its own, so a row written only to the xlsx report is still new to the csv
+    one. The whole table is loaded at start; at 16 hex characters per guide and
+    output it stays small.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    output TEXT NOT NULL,
+                    tracking_number TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    updated_at REAL,
+                    PRIMARY KEY (output, tracking_number)
+                )
+                """
+            )
+            conn.commit()
+            self.known = {
+                (output, tracking_number): digest
+                for output, tracking_number, digest in conn.execute(
+                    "SELECT output, tracking_number, fingerprint FROM fingerprints"
+                )
+            }
+
+    def _connect(self):
+        return contextlib.closing(sqlite3.connect(self.path, timeout=30))
+
+    def classify(self, record, output, pending=None):
+        """
+        Return "new", "changed" or "unchanged" for a record in `output`, and its fingerprint.
+        `pending` holds {(output, tracking_number): fingerprint} accepted in this run but not saved yet.
+        """
+        digest = fingerprint(record)
+        key = (output, record[0])
+        previous = (pending or {}).get(key) or self.known.get(key)
+        if previous is None:
+            return "new", digest
+        return ("unchanged" if previous == digest else "changed"), digest
+
+    def save(self, fingerprints):
+        """Persist {(output, tracking_number): fingerprint} once the matching rows have been written."""
+        if not fingerprints:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO fingerprints (output, tracking_number, fingerprint, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(output, tracking_number) DO UPDATE SET
+                    fingerprint = excluded.fingerprint, updated_at = excluded.updated_at
+                """,
+                [(output, tracking_number, digest, now) for (output, tracking_number), digest in fingerprints.items()],
+            )
+            conn.commit()
+        self.known.update(fingerprints)
@@ -6,8 +6,11 @@ import os
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
+from src.config import LOG_LEVEL, LOG_FORMAT, LOG_FILE
+from src.structured_log import configure_logging
 from src.ui.app import App
 
 if __name__ == "__main__":
+    configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
     app = App()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,243 @@
+import csv
+import datetime
+import json
+import os
+
+from src.config import FINGERPRINTS_PATH, PARQUET_ROW_GROUP_SIZE
+from src.fingerprints import FingerprintStore
+from src.structured_log import get_logger
+from src.utils import REPORT_COLUMNS, create_or_load_excel, get_project_path, get_reports_dir
+
+
+logger = get_logger(__name__)
+
+
+# ============================================================
+# 🧱 SINK INTERFACE
+# ============================================================
+class ReportSink:
+    """Destination for extracted shipment records. Records are lists in REPORT_COLUMNS order."""
+    output = None # Format name, also the key its written rows are fingerprinted under
+    file_name = None
+
+    def write(self, record):
+        self.write_many([record])
+
+    def write_many(self, records):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+def _report_file_name(extension):
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    return os.path.join(get_reports_dir(), f"shipments_{today}.{extension}")
+
+# ============================================================
+# 🧱 XLSX SINK
+# ============================================================
+class XlsxSink(ReportSink):
+    """Today's shipments_YYYY-MM-DD.xlsx. Each flush re-saves the whole workbook, so batch writes."""
+    output = "xlsx"
+
+    def __init__(self):
+        self.wb, self.ws, self.file_name = create_or_load_excel()
+        self.dirty = False
+
+    def write_many(self, records):
+        for record in records:
+            self.ws.append(record)
+        self.dirty = self.dirty or bool(records)
+
+    def flush(self):
+        if self.dirty:
+            self.wb.save(self.file_name)
+            self.dirty = False
+
+# ============================================================
+# 🧱 CSV SINK
+# ============================================================
+class CsvSink(ReportSink):
+    output = "csv"
+
+    def __init__(self):
+        self.file_name = _report_file_name("csv")
+        is_new = not os.path.exists(self.file_name)
+        self.file = open(self.file_name, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(REPORT_COLUMNS)
+
+    def write_many(self, records):
+        self.writer.writerows(records)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# ============================================================
+# 🧱 JSONL SINK
+# ============================================================
+class JsonlSink(ReportSink):
+    output = "jsonl"
+
+    def __init__(self):
+        self.file_name = _report_file_name("jsonl")
+        self.file = open(self.file_name, "a", encoding="utf-8")
+
+    def write_many(self, records):
+        self.file.writelines(
+            json.dumps(dict(zip(REPORT_COLUMNS, record)), ensure_ascii=False) + "\n"
+            for record in records
+        )
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# ============================================================
+# 🧱 PARQUET SINK
+# ============================================================
+class ParquetSink(ReportSink):
+    """
+    Parquet files can't be appended to, so each run writes its own
+    shipments_YYYY-MM-DD_HHMMSS.parquet. Rows are held until there are
+    `row_group_size` of them (PARQUET_ROW_GROUP_SIZE) or the sink is closed,
+    regardless of how often the caller flushes; the file is only readable once
+    closed anyway, so holding them risks nothing a crash wouldn't lose.
+    """
+    output = "parquet"
+
+    def __init__(self, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("The parquet output needs pyarrow. Install it with: pip install pyarrow")
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in REPORT_COLUMNS])
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        self.file_name = os.path.join(get_reports_dir(), f"shipments_{stamp}.parquet")
+        self.writer = pyarrow.parquet.ParquetWriter(self.file_name, self.schema)
+        self.row_group_size = row_group_size
+        self.pending = []
+
+    def write_many(self, records):
+        self.pending.extend(records)
+        if len(self.pending) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        if self.pending:
+            columns = list(zip(*self.pending))
+            table = self.pa.Table.from_arrays(
+                [self.pa.array(column, type=self.pa.string()) for column in columns],
+                schema=self.schema,
+            )
+            self.writer.write_table(table)
+            self.pending = []
+
+    def close(self):
+        self._write_row_group()
+        self.writer.close()
+
+# ============================================================
+# 🧱 FAN-OUT WITH BOUNDED BUFFER
+# ============================================================
+class MultiSink(ReportSink):
+    """
+    Writes every record to several sinks. Records are buffered and handed to
+    the sinks in batches of `buffer_size`, so at most that many are held here;
+    the parquet sink additionally holds up to a row group of its own.
+
+    With a `fingerprint_store`, the fingerprint of every record written to a
+    sink is saved per output after the sinks flush, so a crash never marks a
+    row as written when it wasn't. With `changes_only` as well, each sink only
+    gets the records that are new or changed for its own output.
+    """
+    def __init__(self, sinks, buffer_size=1, fingerprint_store=None, changes_only=False):
+        self.sinks = sinks
+        self.buffer_size = max(1, buffer_size)
+        self.buffers = [[] for _ in sinks]
+        self.buffered = 0
+        self.fingerprint_store = fingerprint_store
+        self.changes_only = changes_only
+        self.pending_fingerprints = {}
+        self.change_counts = {sink.output: {"new": 0, "changed": 0, "unchanged": 0} for sink in sinks}
+
+    @property
+    def file_names(self):
+        return [sink.file_name for sink in self.sinks]
+
+    def write(self, record):
+        for sink, buffer in zip(self.sinks, self.buffers):
+            if self.fingerprint_store is not None:
+                change, digest = self.fingerprint_store.classify(record, sink.output, self.pending_fingerprints)
+                self.change_counts[sink.output][change] += 1
+                if change == "unchanged" and self.changes_only:
+                    logger.debug("Unchanged in %s, not written", sink.output, extra={"guide": record[0], "outcome": "unchanged"})
+                    continue
+                self.pending_fingerprints[(sink.output, record[0])] = digest
+            buffer.append(record)
+        self.buffered += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        for sink, buffer in zip(self.sinks, self.buffers):
+            if buffer:
+                sink.write_many(buffer)
+            sink.flush()
+        self.buffers = [[] for _ in self.sinks]
+        self.buffered = 0
+        if self.fingerprint_store is not None:
+            self.fingerprint_store.save(self.pending_fingerprints)
+            self.pending_fingerprints = {}
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+        if self.changes_only:
+            for output, counts in self.change_counts.items():
+                logger.info("Changes only, %s: %d new, %d changed, %d unchanged skipped",
+                            output, counts["new"], counts["changed"], counts["unchanged"])
+
+
+SINK_TYPES = {
+    "xlsx": XlsxSink,
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+
+def create_sinks(formats, buffer_size=1, changes_only=False):
+    unknown = [fmt for fmt in formats if fmt not in SINK_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)}. Choose from {', '.join(SINK_TYPES)}.")
+    if not formats:
+        raise ValueError("At least one output format is required.")
+    sinks = []
+    try:
+        for fmt in formats:
+            sinks.append(SINK_TYPES[fmt]())
+    except Exception:
+        for sink in sinks:
+            sink.close()
+        raise
+    # Fingerprints are recorded in every mode, so a later changes-only run knows what was written
+    fingerprint_store = FingerprintStore(get_project_path(FINGERPRINTS_PATH))
+    return MultiSink(sinks, buffer_size=buffer_size, fingerprint_store=fingerprint_store, changes_only=changes_only)
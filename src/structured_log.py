@@ -0,0 +1,142 @@
+import atexit
+import contextlib
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import uuid
+
+
+# Fields callers can pass through `extra=` that end up as top-level JSON keys
+CONTEXT_FIELDS = ("guide", "step", "outcome", "duration_ms")
+
+RUN_ID = uuid.uuid4().hex[:12]
+
+_context = threading.local()
+_listener = None
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """
+    Attach fields such as guide=... to every record logged by this thread inside
+    the block. A field passed explicitly through `extra=` wins over the context.
+    """
+    previous = dict(getattr(_context, "fields", {}))
+    _context.fields = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _context.fields = previous
+
+
+def get_logger(name, spec=None):
+    """
+    Logger for a module: get_logger(__name__, __spec__). Under `python -m`
+    __name__ is "__main__", outside the configured "src" tree, so the module's
+    import name is taken from its spec instead.
+    """
+    if name == "__main__" and spec is not None:
+        name = spec.name
+    return logging.getLogger(name)
+
+# ============================================================
+# 🧱 FILTER AND FORMATTERS
+# ============================================================
+class _ContextFilter(logging.Filter):
+    # Runs in the logging thread's caller, so thread-local context is still available
+    def filter(self, record):
+        record.run_id = RUN_ID
+        for key, value in getattr(_context, "fields", {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        if not hasattr(record, "step"):
+            record.step = record.funcName
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() folds the traceback into the message; keep it separate for the JSON "exc" key
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", RUN_ID),
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(step)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        text = super().format(record)
+        details = [f"{field}={getattr(record, field)}" for field in ("guide", "outcome", "duration_ms")
+                   if getattr(record, field, None) is not None]
+        return f"{text} ({', '.join(details)})" if details else text
+
+# ============================================================
+# 🧱 SETUP
+# ============================================================
+def configure_logging(level="INFO", log_format="json", log_file=None):
+    """
+    Route all `src.*` loggers through a queue to a background listener thread,
+    so the automation threads never block on console or file I/O.
+    """
+    global _listener
+    shutdown_logging()
+
+    formatter = JsonFormatter() if log_format == "json" else TextFormatter()
+    handler = logging.FileHandler(log_file, encoding="utf-8") if log_file else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    logger = logging.getLogger("src")
+    logger.handlers = [queue_handler]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -3,14 +3,29 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sv_ttk
 import datetime
+import functools
 import threading
 import time # For potential delays or sleep in automation
 import sys
 import os
 
-from src.automation.web_actions import setup_driver, login, open_shipment_explorer, process_single_shipment, AuthenticationError
-from src.config import LOGIN_URL # Only LOGIN_URL is needed from config now
-from src.utils import create_or_load_excel # Import create_or_load_excel
+from src.automation.web_actions import setup_driver, login, open_shipment_explorer, AuthenticationError
+from src.automation.worker import assemble_report, process_queue
+from src.automation.driver_profiler import finish_profiling, get_profiler
+from src.automation.hedging import HedgedLookup, start_driver_pool, start_pool_driver
+from src.automation.page_recorder import start_recording, stop_recording
+from src.config import (
+    LOGIN_URL, LOG_LEVEL, LOG_FORMAT, LOG_FILE, WORK_QUEUE_PATH, WORK_QUEUE_VISIBILITY_TIMEOUT, WORK_QUEUE_MAX_ATTEMPTS, RECORD_PAGES_DIR,
+    OUTPUT_FORMATS, OUTPUT_BUFFER_SIZE, PROFILE_WEBDRIVER, PROFILE_REPORTS_DIR,
+    REPORT_MODE, RUN_DEADLINE_SECONDS, HEDGE_POOL_SIZE, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_INITIAL_THRESHOLD,
+)
+from src.sinks import SINK_TYPES, create_sinks
+from src.utils import get_project_path
+from src.structured_log import configure_logging, get_logger
+from src.work_queue import LocalWorkQueue, SQLiteWorkQueue, default_worker_id
+
+
+logger = get_logger(__name__, __spec__)
 
 class Toast(tk.Toplevel):
     """A temporary, toast-like notification window."""
@@ -50,19 +65,72 @@ class SettingsFrame(ttk.LabelFrame):
         self.show_browser_toggle = ttk.Checkbutton(self, style="Switch.TCheckbutton", variable=self.show_browser_var)
         self.show_browser_toggle.grid(row=1, column=1, sticky="e", padx=5, pady=5)
 
+        # Output Formats
+        output_label = ttk.Label(self, text="Formatos de Salida:")
+        output_label.grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        output_frame = ttk.Frame(self)
+        output_frame.grid(row=2, column=1, sticky="e", padx=5, pady=5)
+        self.output_format_vars = {}
+        self.output_format_checks = []
+        for col, fmt in enumerate(SINK_TYPES):
+            var = tk.BooleanVar(value=fmt in OUTPUT_FORMATS)
+            check = ttk.Checkbutton(output_frame, text=fmt.upper(), variable=var)
+            check.grid(row=0, column=col, padx=(5, 0))
+            self.output_format_vars[fmt] = var
+            self.output_format_checks.append(check)
+
+        # Run Deadline (enables hedged lookups)
+        deadline_label = ttk.Label(self, text="Tiempo Objetivo (min):")
+        deadline_label.grid(row=3, column=0, sticky="w", padx=5, pady=5)
+        self.deadline_entry = ttk.Entry(self, width=8)
+        if RUN_DEADLINE_SECONDS:
+            self.deadline_entry.insert(0, f"{RUN_DEADLINE_SECONDS / 60:g}")
+        self.deadline_entry.grid(row=3, column=1, sticky="e", padx=5, pady=5)
+
+        # Changes Only Toggle
+        changes_label = ttk.Label(self, text="Solo Cambios:")
+        changes_label.grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.changes_only_var = tk.BooleanVar(value=REPORT_MODE == "changes")
+        self.changes_only_toggle = ttk.Checkbutton(self, style="Switch.TCheckbutton", variable=self.changes_only_var)
+        self.changes_only_toggle.grid(row=4, column=1, sticky="e", padx=5, pady=5)
+
     def _toggle_theme(self):
         sv_ttk.set_theme("light" if sv_ttk.get_theme() == "dark" else "dark")
 
     def get_show_browser_setting(self):
         return self.show_browser_var.get()
 
+    def get_output_formats(self):
+        return [fmt for fmt, var in self.output_format_vars.items() if var.get()]
+
+    def get_changes_only_setting(self):
+        return self.changes_only_var.get()
+
+    def get_deadline_seconds(self):
+        # Empty means no deadline; raises ValueError for anything that isn't a positive number
+        text = self.deadline_entry.get().strip().replace(",", ".")
+        if not text:
+            return None
+        minutes = float(text)
+        if minutes <= 0:
+            raise ValueError(text)
+        return minutes * 60
+
     def disable_fields(self):
         self.theme_toggle.config(state="disabled")
         self.show_browser_toggle.config(state="disabled")
+        for check in self.output_format_checks:
+            check.config(state="disabled")
+        self.deadline_entry.config(state="disabled")
+        self.changes_only_toggle.config(state="disabled")
 
     def enable_fields(self):
         self.theme_toggle.config(state="normal")
         self.show_browser_toggle.config(state="normal")
+        for check in self.output_format_checks:
+            check.config(state="normal")
+        self.deadline_entry.config(state="normal")
+        self.changes_only_toggle.config(state="normal")
 
 
 class ProgressModal(tk.Toplevel):
@@ -111,64 +179,102 @@ class ProgressModal(tk.Toplevel):
 
 
 class AutomationController:
-    def __init__(self, app_instance, username, password, guides, show_browser): # Add show_browser
+    def __init__(self, app_instance, username, password, guides, show_browser, output_formats, deadline_seconds=None, changes_only=False): # Add show_browser
         self.app = app_instance
         self.username = username
         self.password = password
         self.guides = guides
         self.show_browser = show_browser # Store show_browser
+        self.output_formats = output_formats
+        self.deadline_seconds = deadline_seconds
+        self.changes_only = changes_only
         self.driver = None
+        self.drivers = []
         self.stop_event = threading.Event()
+        self.worker_id = default_worker_id()
 
     def _update_progress_ui(self, processed_count, total_count):
         percentage = int((processed_count / total_count) * 100)
         self.app.after(0, lambda: self.app.status_bar.set_progress(percentage))
         self.app.after(0, lambda: self.app.status_bar.set_status(f"Procesando guía {processed_count}/{total_count} ({percentage}%)"))
 
+    def _create_work_queue(self):
+        # Returns (queue, batch). In shared mode this run's guides form one batch: the UI
+        # only leases from it, leaving other operators' guides alone, and its report is
+        # assembled from the queue so rows aren't written twice.
+        if WORK_QUEUE_PATH:
+            queue = SQLiteWorkQueue(get_project_path(WORK_QUEUE_PATH), WORK_QUEUE_VISIBILITY_TIMEOUT, WORK_QUEUE_MAX_ATTEMPTS)
+            return queue, queue.enqueue(self.guides)
+        return LocalWorkQueue(self.guides), None
+
     def run_automation(self):
+        work_queue, batch = self._create_work_queue()
         total_shipments = len(self.guides)
-        processed_count = 0
-        current_shipment_index = 0
-        
-        wb, ws, file_name = create_or_load_excel()
+        counters = {"started": 0, "processed": 0}
+        sink = None
+        hedged_lookup = None
+
+        def on_guide_start(shipment_to_process):
+            counters["started"] += 1
+            started = counters["started"]
+            self.app.after(0, lambda: self.app.status_bar.set_status(f"Procesando guía {started}/{total_shipments} ({shipment_to_process})..."))
+
+        def on_guide_done(shipment_to_process, success_one):
+            if success_one:
+                counters["processed"] += 1
+                self.app.after(0, lambda: Toast(self.app, f"✅ Guía {shipment_to_process} procesada.", success=True))
+            else:
+                self.app.after(0, lambda: Toast(self.app, f"❌ Guía {shipment_to_process} falló.", success=False))
+            self._update_progress_ui(counters["processed"], total_shipments)
 
-        try:
-            self.app.after(0, lambda: self.app.status_bar.set_status("Iniciando navegador..."))
-            self.driver = setup_driver(show_browser=self.show_browser)
-            
-            self.app.after(0, lambda: self.app.status_bar.set_status("Iniciando sesión..."))
-            login(self.driver, self.username, self.password)
-            
-            self.app.after(0, lambda: self.app.status_bar.set_status("Abriendo explorador de envíos..."))
-            open_shipment_explorer(self.driver)
+        def on_reopen():
+            counters["started"] -= 1
+            self.app.after(0, lambda: Toast(self.app, f"⚠️ Redirección detectada. Reabriendo explorador...", success=False))
+            self.app.after(0, lambda: self.app.status_bar.set_status(f"Reabriendo explorador..."))
 
-            while current_shipment_index < total_shipments:
-                shipment_to_process = self.guides[current_shipment_index]
+        if RECORD_PAGES_DIR:
+            start_recording(os.path.join(get_project_path(RECORD_PAGES_DIR), datetime.datetime.now().strftime("%Y%m%d-%H%M%S")))
 
-                self.app.after(0, lambda: self.app.status_bar.set_status(f"Procesando guía {current_shipment_index + 1}/{total_shipments} ({shipment_to_process})..."))
-                
-                success_one, needs_reopen = process_single_shipment(
-                    self.driver, 
-                    shipment_to_process, 
-                    lambda: self._update_progress_ui(processed_count + 1, total_shipments),
-                    wb, ws, file_name
+        try:
+            if batch is None:
+                sink = create_sinks(self.output_formats, buffer_size=OUTPUT_BUFFER_SIZE, changes_only=self.changes_only)
+
+            if self.deadline_seconds:
+                self.app.after(0, lambda: self.app.status_bar.set_status(f"Iniciando {HEDGE_POOL_SIZE} navegadores..."))
+                self.drivers = start_driver_pool(
+                    HEDGE_POOL_SIZE, self.username, self.password,
+                    show_browser=self.show_browser, profile=PROFILE_WEBDRIVER,
                 )
-
-                if needs_reopen:
-                    self.app.after(0, lambda: Toast(self.app, f"⚠️ Redirección detectada. Reabriendo explorador...", success=False))
-                    self.app.after(0, lambda: self.app.status_bar.set_status(f"Reabriendo explorador..."))
-                    open_shipment_explorer(self.driver)
-                    continue
-
-                if not needs_reopen:
-                    if success_one:
-                        processed_count += 1
-                        self.app.after(0, lambda: Toast(self.app, f"✅ Guía {shipment_to_process} procesada.", success=True))
-                    else:
-                        self.app.after(0, lambda: Toast(self.app, f"❌ Guía {shipment_to_process} falló.", success=False))
-                    current_shipment_index += 1
-
-                self._update_progress_ui(processed_count, total_shipments)
+                self.driver = self.drivers[0]
+                hedged_lookup = HedgedLookup(
+                    self.drivers, self.deadline_seconds, work_queue.pending(batch),
+                    HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_INITIAL_THRESHOLD,
+                    start_driver=functools.partial(
+                        start_pool_driver, self.username, self.password, self.show_browser, get_profiler(self.driver)
+                    ),
+                )
+            else:
+                self.app.after(0, lambda: self.app.status_bar.set_status("Iniciando navegador..."))
+                self.driver = setup_driver(show_browser=self.show_browser, profile=PROFILE_WEBDRIVER)
+                self.drivers = [self.driver]
+                
+                self.app.after(0, lambda: self.app.status_bar.set_status("Iniciando sesión..."))
+                login(self.driver, self.username, self.password)
+                
+                self.app.after(0, lambda: self.app.status_bar.set_status("Abriendo explorador de envíos..."))
+                open_shipment_explorer(self.driver)
+
+            process_queue(
+                self.driver, work_queue, self.worker_id, sink,
+                stop_event=self.stop_event,
+                on_guide_start=on_guide_start,
+                on_guide_done=on_guide_done,
+                on_reopen=on_reopen,
+                hedged_lookup=hedged_lookup,
+                batch=batch,
+            )
+            if batch is not None:
+                assemble_report(work_queue, self.output_formats, self.changes_only, batch=batch)
 
             # --- SUCCESS PATH ---
             self.app.after(0, lambda: Toast(self.app, "✅ Proceso de todas las guías completado.", success=True))
@@ -184,18 +290,23 @@ class AutomationController:
         
         except Exception as e:
             # --- GENERIC FAILURE PATH ---
-            print(f"Automation error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Automation error", extra={"outcome": "error"})
             error_message = str(e)
             self.app.after(0, lambda msg=error_message: Toast(self.app, f"❌ Error crítico: {msg}", success=False))
             self.app.after(3500, self._reset_ui_state) # Reset UI after 3.5s
 
         finally:
             # --- CLEANUP ---
-            # The finally block is now only responsible for closing the browser driver.
+            # The finally block is now only responsible for closing the browser drivers.
+            if hedged_lookup:
+                hedged_lookup.close()
             if self.driver:
-                self.driver.quit()
+                finish_profiling(self.driver, get_project_path(PROFILE_REPORTS_DIR))
+            for driver in self.drivers:
+                driver.quit()
+            if sink:
+                sink.close()
+            stop_recording()
 
     def _reset_ui_state(self):
         self.app.config(cursor="")
@@ -272,6 +383,16 @@ class App(tk.Tk):
         username = self.credentials_frame.user_entry.get()
         password = self.credentials_frame.pass_entry.get()
         show_browser = self.settings_frame.get_show_browser_setting() # Get setting
+        output_formats = self.settings_frame.get_output_formats()
+        if not output_formats:
+            Toast(self, "❌ Error: Seleccione al menos un formato de salida.", success=False)
+            return
+        changes_only = self.settings_frame.get_changes_only_setting()
+        try:
+            deadline_seconds = self.settings_frame.get_deadline_seconds()
+        except ValueError:
+            Toast(self, "❌ Error: El tiempo objetivo debe ser un número de minutos.", success=False)
+            return
 
         self.config(cursor="watch")
         self.status_bar.start_button.config(state="disabled")
@@ -281,7 +402,7 @@ class App(tk.Tk):
         self.status_bar.set_progress(0)
         self.status_bar.set_status("Iniciando proceso de automatización...")
 
-        self.automation_controller = AutomationController(self, username, password, guides, show_browser) # Pass show_browser
+        self.automation_controller = AutomationController(self, username, password, guides, show_browser, output_formats, deadline_seconds, changes_only) # Pass show_browser
         self.automation_thread = threading.Thread(target=self.automation_controller.run_automation, daemon=True)
         self.automation_thread.start()
 
@@ -557,5 +678,6 @@ class StatusBar(ttk.Frame):
         self.status_label.config(text=text)
 
 if __name__ == "__main__":
+    configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_FILE)
     app = App()
     app.mainloop()
@@ -4,25 +4,37 @@ from openpyxl import Workbook, load_workbook
 from selenium.common.exceptions import NoAlertPresentException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from src.structured_log import get_logger
 
 
+logger = get_logger(__name__)
+
+REPORT_COLUMNS = ["TrackingNumber", "RecipientName", "Phone", "CommercialValue"]
 
 # ============================================================
-# 🧱 CREATE OR LOAD EXCEL FILE
+# 🧱 PROJECT PATHS
 # ============================================================
-def create_or_load_excel():
-    today = datetime.date.today().strftime("%Y-%m-%d")
-    
-    # Define the reports directory relative to the project root
+def get_project_path(path):
+    # Relative paths in config are relative to the project root
     # Assuming utils.py is in src/
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    reports_dir = os.path.join(project_root, 'data', 'excel_reports')
-    
+    return os.path.join(project_root, path)
+
+
+def get_reports_dir():
+    reports_dir = get_project_path(os.path.join('data', 'excel_reports'))
     # Ensure the directory exists
     os.makedirs(reports_dir, exist_ok=True)
+    return reports_dir
+
+# ============================================================
+# 🧱 CREATE OR LOAD EXCEL FILE
+# ============================================================
+def create_or_load_excel():
+    today = datetime.date.today().strftime("%Y-%m-%d")
     
     # Construct the full file path
-    file_name = os.path.join(reports_dir, f"shipments_{today}.xlsx")
+    file_name = os.path.join(get_reports_dir(), f"shipments_{today}.xlsx")
     
     if os.path.exists(file_name):
         wb = load_workbook(file_name)
@@ -30,7 +42,7 @@ def create_or_load_excel():
     else:
         wb = Workbook()
         ws = wb.active
-        ws.append(["TrackingNumber", "RecipientName", "Phone", "CommercialValue"])
+        ws.append(REPORT_COLUMNS)
     return wb, ws, file_name
 
 # ============================================================
@@ -40,10 +52,10 @@ def handle_alert_and_reopen(driver):
     try:
         alert = driver.switch_to.alert
         msg = alert.text
-        print(f"⚠️ [alert] Detected: {msg}")
+        logger.warning("Alert detected: %s", msg)
         if "register your user" in msg.lower():
             alert.accept()
-            print("🔁 Session expired, redirecting to home...")
+            logger.warning("Session expired, redirecting to home", extra={"outcome": "session_expired"})
             WebDriverWait(driver, 30).until(EC.url_contains("home/applications"))
             return True
         alert.dismiss()
@@ -0,0 +1,308 @@
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+# ============================================================
+# 🧱 LEASE
+# ============================================================
+class Lease:
+    """A guide handed out to one worker until it is completed, failed or released."""
+    def __init__(self, job_id, guide, token):
+        self.job_id = job_id
+        self.guide = guide
+        self.token = token
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+# ============================================================
+# 🧱 LOCAL (IN-MEMORY) QUEUE
+# ============================================================
+class LocalWorkQueue:
+    """
+    In-process queue with the same interface as SQLiteWorkQueue.
+    Used when no shared queue is configured, so a single run behaves as before.
+    """
+    def __init__(self, guides):
+        self.guides = list(guides)
+        self.next_index = 0
+        self.released = []
+        self.results = {}
+
+    def pending(self, batch=None):
+        return len(self.guides) - self.next_index + len(self.released)
+
+    def lease(self, worker_id=None, visibility_timeout=None, batch=None):
+        if self.released:
+            index = self.released.pop(0)
+        elif self.next_index < len(self.guides):
+            index = self.next_index
+            self.next_index += 1
+        else:
+            return None
+        return Lease(index, self.guides[index], None)
+
+    def keep_alive(self, lease):
+        # Local leases never expire
+        return contextlib.nullcontext()
+
+    def complete(self, lease, record):
+        self.results[lease.job_id] = ("done", record)
+        return True
+
+    def fail(self, lease, error=None):
+        self.results[lease.job_id] = ("failed", error)
+        return True
+
+    def release(self, lease):
+        # Put the guide back at the front so it is retried next, like the old index loop did
+        self.released.insert(0, lease.job_id)
+        return True
+
+    def has_outstanding(self, batch=None):
+        return False
+
+
+# ============================================================
+# 🧱 SHARED (SQLITE) QUEUE
+# ============================================================
+class SQLiteWorkQueue:
+    """
+    Work queue stored in a SQLite file, shared by any number of worker processes.
+
+    Workers lease a guide for `visibility_timeout` seconds and renew the lease
+    while they work on it (see `keep_alive`). If the worker dies before completing
+    it, the lease expires and the guide is handed out again, up to `max_attempts` times. Results are stored in the same file so a single
+    process can assemble the final report; each result is reported only once.
+
+    Guides are enqueued as a batch. Workers may lease from any batch, while the
+    process that enqueued a batch can restrict itself to it (see `batch=`).
+    """
+    def __init__(self, path, visibility_timeout=120, max_attempts=3):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guide TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    updated_at REAL,
+                    batch TEXT,
+                    reported_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+
+    def _connect(self):
+        # A new connection per operation keeps the queue safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        return _ClosingConnection(conn)
+
+    def enqueue(self, guides, batch=None):
+        """Add guides as one batch. Returns the batch id."""
+        batch = batch or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO jobs (guide, batch, updated_at) VALUES (?, ?, ?)",
+                [(guide, batch, now) for guide in guides],
+            )
+            conn.execute("COMMIT")
+        return batch
+
+    @staticmethod
+    def _batch_filter(batch):
+        # SQL fragment and params restricting a query to one batch, or to none
+        return (" AND batch = ?", (batch,)) if batch is not None else ("", ())
+
+    def total(self, batch=None):
+        where, params = self._batch_filter(batch)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM jobs WHERE 1 = 1{where}", params).fetchone()[0]
+
+    def pending(self, batch=None):
+        where, params = self._batch_filter(batch)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased'){where}", params
+            ).fetchone()[0]
+
+    def _reclaim(self, conn, now):
+        conn.execute(
+            """
+            UPDATE jobs SET status = 'failed', error = 'lease expired too many times',
+                lease_owner = NULL, lease_token = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """,
+            (now, now, self.max_attempts),
+        )
+        conn.execute(
+            """
+            UPDATE jobs SET status = 'pending',
+                lease_owner = NULL, lease_token = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ?
+            """,
+            (now, now),
+        )
+
+    def lease(self, worker_id, visibility_timeout=None, batch=None):
+        timeout = visibility_timeout or self.visibility_timeout
+        where, params = self._batch_filter(batch)
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._reclaim(conn, now)
+            row = conn.execute(
+                f"SELECT id, guide FROM jobs WHERE status = 'pending'{where} ORDER BY id LIMIT 1", params
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'leased', attempts = attempts + 1,
+                    lease_owner = ?, lease_token = ?, lease_expires = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (worker_id, token, now + timeout, now, row[0]),
+            )
+            conn.execute("COMMIT")
+        return Lease(row[0], row[1], token)
+
+    def extend(self, lease, visibility_timeout=None):
+        timeout = visibility_timeout or self.visibility_timeout
+        now = time.time()
+        return self._update_leased(
+            lease, "lease_expires = ?, updated_at = ?", (now + timeout, now)
+        )
+
+    @contextlib.contextmanager
+    def keep_alive(self, lease, interval=None):
+        """
+        Extend `lease` every `interval` seconds (a third of the visibility timeout
+        by default) while the block runs, so a slow lookup doesn't lose its guide
+        to another worker. Renewal stops once the lease is gone.
+        """
+        interval = interval or self.visibility_timeout / 3
+        stop_event = threading.Event()
+
+        def renew():
+            while not stop_event.wait(interval):
+                if not self.extend(lease):
+                    return
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            stop_event.set()
+            renewer.join()
+
+    def complete(self, lease, record):
+        return self._finish(lease, "done", result=json.dumps(record, ensure_ascii=False))
+
+    def fail(self, lease, error=None):
+        return self._finish(lease, "failed", error=error)
+
+    def release(self, lease):
+        """Give a lease back without counting it as an attempt (e.g. the explorer had to be reopened)."""
+        return self._update_leased(
+            lease,
+            "status = 'pending', attempts = attempts - 1, lease_owner = NULL, "
+            "lease_token = NULL, lease_expires = NULL, updated_at = ?",
+            (time.time(),),
+        )
+
+    def _finish(self, lease, status, result=None, error=None):
+        return self._update_leased(
+            lease,
+            "status = ?, result = ?, error = ?, lease_owner = NULL, "
+            "lease_token = NULL, lease_expires = NULL, updated_at = ?",
+            (status, result, error, time.time()),
+        )
+
+    def _update_leased(self, lease, assignments, params):
+        # The token check makes a worker whose lease expired (and was re-leased) a no-op
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (*params, lease.job_id, lease.token),
+            )
+            return cursor.rowcount == 1
+
+    def has_outstanding(self, batch=None):
+        """True while other workers still hold leases that may be reclaimed later."""
+        return self.pending(batch) > 0
+
+    def counts(self, batch=None):
+        where, params = self._batch_filter(batch)
+        with self._connect() as conn:
+            return dict(conn.execute(
+                f"SELECT status, COUNT(*) FROM jobs WHERE 1 = 1{where} GROUP BY status", params
+            ).fetchall())
+
+    def unreported_results(self, batch=None):
+        """
+        Completed records not yet written to a report, in queue order.
+        Returns (job_ids, records); pass job_ids to mark_reported once written.
+        """
+        where, params = self._batch_filter(batch)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, result FROM jobs WHERE status = 'done' AND reported_at IS NULL{where} ORDER BY id",
+                params,
+            ).fetchall()
+        return [row[0] for row in rows], [json.loads(row[1]) for row in rows]
+
+    def mark_reported(self, job_ids):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("UPDATE jobs SET reported_at = ? WHERE id = ?", [(now, job_id) for job_id in job_ids])
+            conn.execute("COMMIT")
+
+    def failures(self, batch=None):
+        where, params = self._batch_filter(batch)
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT guide, error FROM jobs WHERE status = 'failed'{where} ORDER BY id", params
+            ).fetchall()
+
+
+class _ClosingConnection:
+    """Context manager that closes the sqlite3 connection (sqlite3's own only commits)."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+        return False
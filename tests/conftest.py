@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make `src` importable when pytest is run from anywhere, like main.py does
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,68 @@
+from src.automation.driver_profiler import NO_GUIDE, DriverProfiler, profile_guide
+
+
+class FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {"value": driver_command}
+
+
+# Steps live in a module under src.automation, like web_actions, so the profiler treats them as ours
+STEPS_SOURCE = '''
+def _wait_until(condition):
+    return condition()
+
+def _sleep(driver):
+    return driver.execute("getTitle")
+
+def lookup_shipment(driver):
+    _wait_until(lambda: driver.execute("findElement"))
+    [driver.execute("getElementAttribute") for _ in range(2)]
+    _sleep(driver)
+
+def open_shipment_explorer(driver):
+    driver.execute("getWindowHandles")
+'''
+
+
+def load_steps():
+    steps = {"__name__": "src.automation.web_actions"}
+    exec(compile(STEPS_SOURCE, "web_actions.py", "exec"), steps)
+    return steps
+
+
+def test_commands_are_charged_to_the_named_step():
+    steps = load_steps()
+    driver = DriverProfiler().attach(FakeDriver())
+    steps["lookup_shipment"](driver)
+    assert {record[1] for record in driver.profiler.records} == {"web_actions.lookup_shipment"}
+
+
+def test_report_aggregates_by_guide_command_and_step():
+    steps = load_steps()
+    driver = DriverProfiler().attach(FakeDriver())
+    steps["open_shipment_explorer"](driver)
+    for guide in ("g1", "g2"):
+        with profile_guide(guide):
+            steps["lookup_shipment"](driver)
+
+    report = driver.profiler.report()
+    assert report["total_round_trips"] == 9
+    assert report["setup"]["guide"] == NO_GUIDE
+    assert report["setup"]["round_trips"] == 1
+    assert [(row["guide"], row["round_trips"]) for row in report["guides"]] in (
+        [("g1", 4), ("g2", 4)], [("g2", 4), ("g1", 4)],
+    )
+    commands = {row["command"]: row["round_trips"] for row in report["hottest_commands"]}
+    assert commands == {"findElement": 2, "getElementAttribute": 4, "getTitle": 2, "getWindowHandles": 1}
+    steps_seen = {(row["step"], row["command"]): row["round_trips"] for row in report["hottest_steps"]}
+    assert steps_seen[("web_actions.lookup_shipment", "getElementAttribute")] == 4
+    assert steps_seen[("web_actions.open_shipment_explorer", "getWindowHandles")] == 1
+
+
+def test_report_limits_hot_lists_to_top():
+    steps = load_steps()
+    driver = DriverProfiler().attach(FakeDriver())
+    steps["lookup_shipment"](driver)
+    report = driver.profiler.report(top=1)
+    assert len(report["hottest_commands"]) == 1
+    assert len(report["hottest_steps"]) == 1
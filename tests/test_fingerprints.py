@@ -0,0 +1,23 @@
+from src.fingerprints import FingerprintStore
+
+
+def test_outputs_are_tracked_apart(tmp_path):
+    path = str(tmp_path / "fingerprints.sqlite3")
+    store = FingerprintStore(path)
+    record = ["a", "Ana", "300", "10000"]
+    change, digest = store.classify(record, "xlsx")
+    assert change == "new"
+    store.save({("xlsx", "a"): digest})
+
+    reloaded = FingerprintStore(path)
+    assert reloaded.classify(record, "xlsx")[0] == "unchanged"
+    assert reloaded.classify(record, "csv")[0] == "new"
+    assert reloaded.classify(["a", "Ana", "301", "10000"], "xlsx")[0] == "changed"
+
+
+def test_pending_fingerprints_count_before_save(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite3"))
+    record = ["a", "Ana", "300", "10000"]
+    _, digest = store.classify(record, "csv")
+    assert store.classify(record, "csv", {("csv", "a"): digest})[0] == "unchanged"
+
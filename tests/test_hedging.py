@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.automation import hedging
+from src.automation.hedging import HedgedLookup
+
+
+class FakeDriver:
+    def __init__(self, name, delay=0.0, reopens=True):
+        self.name = name
+        self.delay = delay
+        self.reopens = reopens
+        self.cancelled = False
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def fake_lookup(driver, guide, cancel_event):
+    if cancel_event.wait(driver.delay):
+        driver.cancelled = True
+        return None, False
+    if not driver.reopens:
+        return None, True
+    return [guide, driver.name, "", ""], False
+
+
+def fake_open_explorer(driver):
+    if not driver.reopens:
+        raise RuntimeError("Explorer did not load")
+
+
+@pytest.fixture(autouse=True)
+def fake_portal(monkeypatch):
+    monkeypatch.setattr(hedging, "lookup_shipment", fake_lookup)
+    monkeypatch.setattr(hedging, "open_shipment_explorer", fake_open_explorer)
+    monkeypatch.setattr(hedging.random, "uniform", lambda a, b: 0)
+
+
+def make_lookup(drivers, deadline_seconds=3600, total_guides=10, **kwargs):
+    return HedgedLookup(drivers, deadline_seconds, total_guides, percentile=90, min_samples=5,
+                        initial_threshold=10.0, **kwargs)
+
+
+def test_threshold_uses_initial_value_until_min_samples():
+    lookup = make_lookup([FakeDriver("a")])
+    lookup.latencies = [1.0, 2.0, 3.0]
+    assert lookup.hedge_threshold() == 10.0
+
+
+def test_threshold_is_the_latency_percentile():
+    lookup = make_lookup([FakeDriver("a")])
+    lookup.latencies = [float(n) for n in range(1, 11)]
+    assert lookup.hedge_threshold() == 10.0
+    lookup.latencies = [float(n) for n in range(1, 21)]
+    assert lookup.hedge_threshold() == 19.0
+
+
+def test_threshold_is_capped_by_the_deadline_budget():
+    lookup = make_lookup([FakeDriver("a")], deadline_seconds=20, total_guides=10)
+    assert 1.5 < lookup.hedge_threshold() <= 2.0
+
+
+def test_threshold_never_drops_below_the_fastest_lookup():
+    lookup = make_lookup([FakeDriver("a")], deadline_seconds=1, total_guides=100)
+    assert lookup.hedge_threshold() == 0.5
+    lookup.latencies = [3.0, 4.0]
+    assert lookup.hedge_threshold() == 3.0
+
+
+def test_first_result_wins_and_the_loser_is_cancelled():
+    slow, fast = FakeDriver("slow", delay=5), FakeDriver("fast")
+    lookup = make_lookup([slow, fast], deadline_seconds=1, total_guides=1)
+    assert lookup.lookup("g1") == ["g1", "fast", "", ""]
+    lookup.close()
+    assert slow.cancelled
+    assert (lookup.hedged_count, lookup.hedge_wins) == (1, 1)
+
+
+def test_straggler_is_hedged_on_a_driver_that_frees_up_later():
+    slow, late = FakeDriver("slow", delay=5), FakeDriver("late")
+    lookup = make_lookup([slow, late], deadline_seconds=1, total_guides=1)
+    # `late` is still pausing after its previous guide when the threshold passes
+    lookup.idle_drivers.queue.remove(late)
+    threading.Timer(0.8, lookup.idle_drivers.put, [late]).start()
+    assert lookup.lookup("g1") == ["g1", "late", "", ""]
+    lookup.close()
+    assert lookup.hedged_count == 1
+
+
+def test_fast_lookup_is_not_hedged():
+    lookup = make_lookup([FakeDriver("a"), FakeDriver("b")])
+    assert lookup.lookup("g1") == ["g1", "a", "", ""]
+    lookup.close()
+    assert lookup.hedged_count == 0
+
+
+def test_driver_that_cannot_reopen_is_replaced():
+    broken, fresh = FakeDriver("broken", reopens=False), FakeDriver("fresh")
+    drivers = [broken]
+    lookup = make_lookup(drivers, start_driver=lambda: fresh)
+    assert lookup.lookup("g1") is None
+    assert lookup.lookup("g2") == ["g2", "fresh", "", ""]
+    lookup.close()
+    assert broken.quit_called
+    assert drivers == [fresh]
+
+
+def test_pool_without_usable_drivers_fails_instead_of_blocking():
+    broken = FakeDriver("broken", reopens=False)
+    drivers = [broken]
+    lookup = make_lookup(drivers)
+    assert lookup.lookup("g1") is None
+    time.sleep(0.2)
+    with pytest.raises(RuntimeError):
+        lookup.lookup("g2")
+    lookup.close()
+    assert drivers == []
@@ -0,0 +1,83 @@
+import os
+import urllib.request
+from html.parser import HTMLParser
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.automation.page_recorder import replay_snapshots
+
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "snapshots")
+VOID_TAGS = {"input", "br", "img", "meta", "link", "hr"}
+
+
+class FakeElement:
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.text = ""
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def is_displayed(self):
+        return "display:none" not in (self.attrs.get("style") or "").replace(" ", "")
+
+
+class _ElementsById(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.elements = {}
+        self.open = []
+
+    def handle_starttag(self, tag, attrs):
+        element = FakeElement(dict(attrs))
+        if element.attrs.get("id"):
+            self.elements[element.attrs["id"]] = element
+        if tag not in VOID_TAGS:
+            self.open.append(element)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS and self.open:
+            self.open.pop()
+
+    def handle_data(self, data):
+        for element in self.open:
+            element.text += data
+
+
+class FakeDriver:
+    """Loads the served snapshot over HTTP and answers By.ID lookups from its markup."""
+    def __init__(self):
+        self.elements = {}
+
+    def get(self, url):
+        with urllib.request.urlopen(url) as response:
+            parser = _ElementsById()
+            parser.feed(response.read().decode("utf-8"))
+        self.elements = parser.elements
+
+    def find_element(self, by, value):
+        assert by == "id"
+        if value not in self.elements:
+            raise LookupError(value)
+        return self.elements[value]
+
+
+def test_replay_reports_passes_and_mismatches():
+    summary = replay_snapshots(SNAPSHOT_DIR, driver=FakeDriver())
+    assert summary["snapshots"] == 3
+    assert summary["checks"] == 3
+    assert summary["passed"] == 2
+    assert summary["mismatches"] == [{
+        "file": "20250101-090020-00003-result_240002.html",
+        "expected": ["240002", "LUIS GOMEZ", "3109876543", "$ 99.000"],
+        "observed": ["240002", "LUIS GOMEZ", "3109876543", "$ 12.000"],
+    }]
+
+
+def test_replay_repeats_the_whole_set():
+    summary = replay_snapshots(SNAPSHOT_DIR, driver=FakeDriver(), repeat=2)
+    assert summary["checks"] == 6
+    assert summary["passed"] == 4
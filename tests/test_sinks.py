@@ -0,0 +1,102 @@
+import csv
+import json
+
+import pytest
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("selenium")
+
+from src import sinks
+from src.fingerprints import FingerprintStore
+from src.sinks import CsvSink, JsonlSink, MultiSink, ReportSink, create_sinks
+from src.utils import REPORT_COLUMNS
+
+
+RECORD = ["240001", "ANA PEREZ", "3001234567", "$ 50.000"]
+
+
+class RecordingSink(ReportSink):
+    def __init__(self, output):
+        self.output = output
+        self.file_name = f"{output}.out"
+        self.batches = []
+        self.flushes = 0
+        self.closed = False
+
+    def write_many(self, records):
+        self.batches.append(list(records))
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def reports_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sinks, "get_reports_dir", lambda: str(tmp_path))
+    return tmp_path
+
+
+def test_csv_header_is_written_only_for_a_new_file(reports_dir):
+    for _ in range(2):
+        sink = CsvSink()
+        sink.write(RECORD)
+        sink.close()
+    with open(sink.file_name, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows == [REPORT_COLUMNS, RECORD, RECORD]
+
+
+def test_jsonl_lines_are_keyed_by_report_columns(reports_dir):
+    sink = JsonlSink()
+    sink.write_many([RECORD])
+    sink.close()
+    with open(sink.file_name, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [dict(zip(REPORT_COLUMNS, RECORD))]
+
+
+def test_multi_sink_flushes_every_buffer_size_records():
+    target = RecordingSink("csv")
+    sink = MultiSink([target], buffer_size=2)
+    sink.write(RECORD)
+    assert target.batches == []
+    sink.write(RECORD)
+    assert target.batches == [[RECORD, RECORD]]
+    sink.write(RECORD)
+    sink.close()
+    assert target.batches == [[RECORD, RECORD], [RECORD]]
+    assert target.closed
+
+
+def test_multi_sink_fans_out_to_every_sink():
+    targets = [RecordingSink("csv"), RecordingSink("jsonl")]
+    sink = MultiSink(targets)
+    sink.write_many([RECORD])
+    sink.close()
+    assert [target.batches for target in targets] == [[[RECORD]], [[RECORD]]]
+    assert sink.file_names == ["csv.out", "jsonl.out"]
+
+
+def test_all_mode_records_fingerprints_for_a_later_changes_only_run(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite3"))
+    first = RecordingSink("csv")
+    sink = MultiSink([first], fingerprint_store=store)
+    sink.write_many([RECORD, RECORD])
+    sink.close()
+    assert first.batches == [[RECORD], [RECORD]]
+
+    changed = [RECORD[0], RECORD[1], "3109876543", RECORD[3]]
+    csv_target, jsonl_target = RecordingSink("csv"), RecordingSink("jsonl")
+    sink = MultiSink([csv_target, jsonl_target], fingerprint_store=store, changes_only=True)
+    sink.write_many([RECORD, changed])
+    sink.close()
+    assert csv_target.batches == [[changed]]
+    assert jsonl_target.batches == [[RECORD], [changed]]
+
+
+@pytest.mark.parametrize("formats", [["xlsx", "pdf"], []])
+def test_create_sinks_rejects_unknown_or_empty_formats(formats):
+    with pytest.raises(ValueError):
+        create_sinks(formats)
@@ -0,0 +1,65 @@
+import json
+import types
+
+import pytest
+
+from src.structured_log import RUN_ID, configure_logging, get_logger, log_context, shutdown_logging
+
+
+@pytest.fixture
+def log_lines(tmp_path):
+    log_file = tmp_path / "run.log"
+    configure_logging("DEBUG", "json", str(log_file))
+
+    def read():
+        shutdown_logging()
+        with open(log_file, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    yield read
+    shutdown_logging()
+
+
+def test_json_records_carry_run_and_guide_fields(log_lines):
+    logger = get_logger("src.tests")
+    logger.info("Guide processed", extra={"guide": "240001", "outcome": "success", "duration_ms": 812.5})
+
+    [entry] = log_lines()
+    assert entry["run_id"] == RUN_ID
+    assert entry["logger"] == "src.tests"
+    assert entry["level"] == "INFO"
+    assert entry["msg"] == "Guide processed"
+    assert (entry["guide"], entry["outcome"], entry["duration_ms"]) == ("240001", "success", 812.5)
+    assert entry["step"] == "test_json_records_carry_run_and_guide_fields"
+    assert "exc" not in entry
+
+
+def test_exceptions_are_kept_in_their_own_key(log_lines):
+    try:
+        raise ValueError("bad page")
+    except ValueError:
+        get_logger("src.tests").exception("Lookup failed", extra={"outcome": "error"})
+
+    [entry] = log_lines()
+    assert entry["msg"] == "Lookup failed"
+    assert entry["outcome"] == "error"
+    assert "ValueError: bad page" in entry["exc"]
+
+
+def test_log_context_fills_fields_and_explicit_extra_wins(log_lines):
+    logger = get_logger("src.tests")
+    with log_context(guide="240001", step="lookup"):
+        logger.info("From context")
+        logger.info("Explicit guide", extra={"guide": "240002"})
+    logger.info("Outside")
+
+    from_context, explicit, outside = log_lines()
+    assert (from_context["guide"], from_context["step"]) == ("240001", "lookup")
+    assert (explicit["guide"], explicit["step"]) == ("240002", "lookup")
+    assert "guide" not in outside
+
+
+def test_get_logger_names_main_modules_after_their_spec():
+    spec = types.SimpleNamespace(name="src.automation.worker")
+    assert get_logger("__main__", spec).name == "src.automation.worker"
+    assert get_logger("src.sinks", None).name == "src.sinks"
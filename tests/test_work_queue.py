@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from src.work_queue import LocalWorkQueue, SQLiteWorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteWorkQueue(str(tmp_path / "queue.sqlite3"), visibility_timeout=0.2, max_attempts=2)
+
+
+def test_leases_each_guide_once(queue):
+    queue.enqueue(["a", "b"])
+    first, second = queue.lease("w1"), queue.lease("w2")
+    assert {first.guide, second.guide} == {"a", "b"}
+    assert queue.lease("w3") is None
+    assert queue.has_outstanding()
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_is_ignored(queue):
+    queue.enqueue(["a"])
+    stale = queue.lease("w1")
+    time.sleep(0.3)
+    fresh = queue.lease("w2")
+    assert fresh.guide == "a"
+    assert not queue.complete(stale, ["a", "stale"])
+    assert queue.complete(fresh, ["a", "fresh"])
+    assert queue.unreported_results()[1] == [["a", "fresh"]]
+
+
+def test_lease_fails_after_max_attempts(queue):
+    queue.enqueue(["a"])
+    queue.lease("w1")
+    time.sleep(0.3)
+    queue.lease("w2")
+    time.sleep(0.3)
+    assert queue.lease("w3") is None
+    assert queue.failures() == [("a", "lease expired too many times")]
+    assert not queue.has_outstanding()
+
+
+def test_release_does_not_count_as_attempt(queue):
+    queue.enqueue(["a"])
+    for _ in range(3):
+        lease = queue.lease("w1")
+        assert lease.guide == "a"
+        assert queue.release(lease)
+    assert queue.counts() == {"pending": 1}
+
+
+def test_batches_are_isolated(queue):
+    mine = queue.enqueue(["a"])
+    queue.enqueue(["b"])
+    assert queue.lease("ui", batch=mine).guide == "a"
+    assert queue.lease("ui", batch=mine) is None
+    assert queue.total(mine) == 1
+    assert queue.lease("cli").guide == "b"
+
+
+def test_results_are_reported_once(queue):
+    queue.enqueue(["a"])
+    queue.complete(queue.lease("w1"), ["a", "n", "p", "v"])
+    job_ids, records = queue.unreported_results()
+    assert records == [["a", "n", "p", "v"]]
+    queue.mark_reported(job_ids)
+    assert queue.unreported_results() == ([], [])
+
+
+def test_local_queue_retries_released_guide_first():
+    queue = LocalWorkQueue(["x", "y"])
+    lease = queue.lease()
+    queue.release(lease)
+    assert [queue.lease().guide, queue.lease().guide] == ["x", "y"]
+    assert queue.lease() is None
+
+
+def test_keep_alive_renews_lease_while_in_flight(queue):
+    queue.enqueue(["a"])
+    lease = queue.lease("w1")
+    with queue.keep_alive(lease, interval=0.05):
+        time.sleep(0.4)
+        assert queue.lease("w2") is None
+    assert queue.complete(lease, ["a", "n", "p", "v"])